@@ -7,6 +7,13 @@ MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "750000"))
 # Max number of concurrent file fetching requests
 MAX_CONCURRENT_REQUESTS: int = int(os.getenv("MAX_CONCURRENT_REQUESTS", "10"))
 
+# Number of blobs fetched per GraphQL request (only used with a token)
+GRAPHQL_BLOB_BATCH_SIZE: int = int(os.getenv("GRAPHQL_BLOB_BATCH_SIZE", "50"))
+
+# Files with at least this many characters are scanned in the worker
+# process pool; smaller ones are scanned inline on the event loop
+SCAN_POOL_MIN_FILE_SIZE: int = int(os.getenv("SCAN_POOL_MIN_FILE_SIZE", "16384"))
+
 # Cap on total files to scan to prevent memory issues
 MAX_FILES_PER_SCAN: int = int(os.getenv("MAX_FILES_PER_SCAN", "2000"))
 
@@ -0,0 +1,14 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from .main import app
+
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    A TestClient shared by the whole test session. Used as a context
+    manager so the app's lifespan startup and shutdown both run.
+    """
+    with TestClient(app) as test_client:
+        yield test_client
@@ -1,43 +1,119 @@
 import re
+import sys
 import math
-from typing import List, Dict, Optional
-from collections import Counter
+from typing import List, Dict, Optional, Set, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to the NumPy path
+    njit = None
+
+try:
+    import hyperscan
+except ImportError:  # hyperscan is optional; every file goes through `re`
+    hyperscan = None
 
 from . import config
 from .models import Finding
 
 # --- Detector Constants ---
 ENTROPY_THRESHOLD: float = 4.5
+# Entropy is at most log2(unique chars), so anything with fewer distinct
+# characters than this can never clear ENTROPY_THRESHOLD.
+_MIN_UNIQUE_CHARS: int = math.floor(2 ** ENTROPY_THRESHOLD) + 1
 SNIPPET_MAX_LEN: int = 200
+_CONFIDENCE_RANK: Dict[str, int] = {"low": 1, "medium": 2, "high": 3}
 
 # --- Regex Patterns ---
-REGEX_RULES = {
-    "AWS_ACCESS_KEY": {
-        "pattern": re.compile(r"AKIA[0-9A-Z]{16}"),
-        "confidence": "high",
-    },
-    "SLACK_TOKEN_LEGACY": {
-        "pattern": re.compile(r"xox[abop]-[0-9a-zA-Z-]{10,48}"),
-        "confidence": "high",
-    },
-    "SLACK_WEBHOOK": {
-        "pattern": re.compile(r"T[A-Za-z0-9_]{8}/B[A-Za-z0-9_]{8,12}/[A-Za-z0-9_]{24}"),
-        "confidence": "high",
-    },
-    "GITHUB_TOKEN": {
-        "pattern": re.compile(r"gh[pousr]_[A-Za-z0-9_]{36,255}"),
-        "confidence": "high",
-    },
-    "STRIPE_API_KEY": {
-        "pattern": re.compile(r"sk_(live|test)_[A-Za-z0-9]{24,99}"),
-        "confidence": "high",
-    },
-    "GENERIC_HIGH_ENTROPY_STRING": {
-        "pattern": re.compile(r"[\"']?[A-Za-z0-9_.+-]{32,128}[\"']?"),
-        "confidence": "low",
-    },
+# Every pattern in this module is compiled exactly once, at import.
+# find_secrets / is_file_scannable run for every file of every scan, so
+# don't build or compile patterns inside them (see test_detectors.py).
+
+# Possessive on Python 3.11+: a run is never given back once matched, so
+# the engine keeps no backtracking state for it.
+_RUN_QUANTIFIER = "{32,}+" if sys.version_info >= (3, 11) else "{32,}"
+# Entropy is checked per window of this many chars, so a long run (e.g. a
+# JWT) is judged like the 128-char candidates it used to be split into.
+_ENTROPY_WINDOW: int = 128
+
+_PATTERNS: Dict[str, str] = {
+    "AWS_ACCESS_KEY": r"AKIA[0-9A-Z]{16}",
+    "SLACK_TOKEN_LEGACY": r"xox[abop]-[0-9a-zA-Z-]{10,48}",
+    "SLACK_WEBHOOK": r"T[A-Za-z0-9_]{8}/B[A-Za-z0-9_]{8,12}/[A-Za-z0-9_]{24}",
+    "GITHUB_TOKEN": r"gh[pousr]_[A-Za-z0-9_]{36,255}",
+    "STRIPE_API_KEY": r"sk_(?:live|test)_[A-Za-z0-9]{24,99}",
+    # The lookbehind pins matches to the start of a run of the class, so the
+    # engine does not retry every offset inside a long run of alphanumerics.
+    # Runs of any length match whole; see _ENTROPY_WINDOW.
+    "GENERIC_HIGH_ENTROPY_STRING": r"(?<![A-Za-z0-9_.+-])[A-Za-z0-9_.+-]" + _RUN_QUANTIFIER,
+}
+
+_RULES_META: Dict[str, Dict[str, str]] = {
+    "AWS_ACCESS_KEY": {"confidence": "high"},
+    "SLACK_TOKEN_LEGACY": {"confidence": "high"},
+    "SLACK_WEBHOOK": {"confidence": "high"},
+    "GITHUB_TOKEN": {"confidence": "high"},
+    "STRIPE_API_KEY": {"confidence": "high"},
+    "GENERIC_HIGH_ENTROPY_STRING": {"confidence": "low"},
 }
 
+_GENERIC_RULE_ID = "GENERIC_HIGH_ENTROPY_STRING"
+
+# All specific rules in one alternation, so the content is scanned once and
+# `match.lastgroup` tells us which rule fired. The generic rule is kept out of
+# it: alternation is leftmost-first, so it would swallow overlapping tokens
+# (e.g. the opening quote in front of a GitHub token).
+_COMBINED = re.compile(
+    "|".join(
+        f"(?P<{name}>{src})"
+        for name, src in _PATTERNS.items()
+        if name != _GENERIC_RULE_ID
+    )
+)
+_GENERIC = re.compile(_PATTERNS[_GENERIC_RULE_ID], re.ASCII)
+
+# --- Hyperscan Prefilter ---
+# Hyperscan tells us in one SIMD pass whether any rule can match anywhere
+# in a file, far faster than `re` walks the same text. Most files have no
+# candidates at all, so the `re` passes (which give us the offsets and the
+# lookarounds Hyperscan lacks) only run when the prefilter says so.
+_HS_SPECIFIC_ID = 0
+_HS_GENERIC_ID = 1
+
+def _build_prefilter():
+    specific = [src for name, src in _PATTERNS.items() if name != _GENERIC_RULE_ID]
+    database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    database.compile(
+        # Any generic candidate contains a run of 32 chars of its class
+        expressions=[src.encode() for src in specific] + [rb"[A-Za-z0-9_.+-]{32}"],
+        ids=[_HS_SPECIFIC_ID] * len(specific) + [_HS_GENERIC_ID],
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH] * (len(specific) + 1),
+    )
+    return database
+
+_PREFILTER_DB = _build_prefilter() if hyperscan is not None else None
+
+# --- Denylist Matchers ---
+# One C-level scan per path instead of a Python-level check per denylist
+# entry. Longest extensions first, so e.g. ".min.js" wins over a shorter
+# suffix of it.
+_DENY_EXT_RE = re.compile(
+    "(?:"
+    + "|".join(re.escape(ext) for ext in sorted(config.FILE_EXT_DENYLIST, key=len, reverse=True))
+    + ")$"
+)
+_DENY_PATH_RE = re.compile("|".join(re.escape(fragment) for fragment in config.FILE_PATH_DENYLIST))
+
+# The same line boundaries str.splitlines() uses, so line numbers match it.
+_LINE_BREAK_CHARS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+_LINE_BREAK_RE = re.compile("\r\n|[" + _LINE_BREAK_CHARS + "]")
+
+_KEYWORD_RE = re.compile(
+    "|".join(re.escape(keyword) for keyword in sorted(config.KEYWORD_PATTERNS, key=len, reverse=True))
+)
+
 # --- Main Detector Functions ---
 
 def is_file_scannable(file_path: str, file_size: Optional[int]) -> bool:
@@ -52,11 +128,11 @@ def is_file_scannable(file_path: str, file_size: Optional[int]) -> bool:
     lower_path = file_path.lower()
 
     # 2. Check extension
-    if any(lower_path.endswith(ext) for ext in config.FILE_EXT_DENYLIST):
+    if _DENY_EXT_RE.search(lower_path):
         return False
 
     # 3. Check path fragments
-    if any(denied in lower_path for denied in config.FILE_PATH_DENYLIST):
+    if _DENY_PATH_RE.search(lower_path):
         return False
 
     return True
@@ -68,58 +144,119 @@ def find_secrets(file_path: str, content: str) -> List[Finding]:
     Scans the given content for secrets.
     """
     findings: List[Finding] = []
-    lines = content.splitlines()
-
-    for line_number, line in enumerate(lines, 1):
-        # 1. Check Regex Rules
-        for rule_id, rule in REGEX_RULES.items():
-            for match in rule["pattern"].finditer(line):
-                confidence = rule["confidence"]
-                
-                if confidence != "high" and _keywords_are_present(line):
-                    confidence = "medium"
-
-                findings.append(
-                    Finding(
-                        file_path=file_path, 
-                        line=line_number,
-                        snippet=_create_snippet_with_redaction(line, match.start(), match.end()),
-                        rule_id="regex",
-                        confidence=confidence,
-                    )
+    # Entropy findings are added after all regex findings, so on a
+    # confidence tie they win dedup over any generic candidate on the line.
+    entropy_findings: List[Finding] = []
+    candidates = _prefilter(content)
+    specific_matches = list(_COMBINED.finditer(content)) if _HS_SPECIFIC_ID in candidates else []
+    generic_matches = list(_GENERIC.finditer(content)) if _HS_GENERIC_ID in candidates else []
+
+    if not specific_matches and not generic_matches:
+        return findings
+
+    # Offset of the first character of each line (plus a sentinel at the
+    # end), so match offsets in `content` can be mapped back to their lines
+    # with a binary search. Lines are only sliced out when a match needs one.
+    line_starts = [0, *(m.end() for m in _LINE_BREAK_RE.finditer(content)), len(content)]
+    line_starts_array = np.array(line_starts, dtype=np.int64)
+    # Keyword check per line, cached: a line often holds several candidates.
+    keyword_lines: Dict[int, bool] = {}
+    # Lines that already have a high-confidence finding; dedup would drop
+    # anything else found on them, so the generic rule skips them.
+    high_lines: Set[int] = set()
+
+    # 1. Check Regex Rules
+    for match, line_number in zip(specific_matches, _line_numbers(line_starts_array, specific_matches)):
+        line_start = line_starts[line_number - 1]
+        line = _line_text(content, line_starts, line_number)
+        confidence = _RULES_META[match.lastgroup]["confidence"]
+
+        if confidence == "high":
+            high_lines.add(line_number)
+
+        findings.append(
+            Finding(
+                file_path=file_path,
+                line=line_number,
+                snippet=_create_snippet_with_redaction(
+                    line, match.start() - line_start, match.end() - line_start
+                ),
+                rule_id="regex",
+                confidence=confidence,
+            )
+        )
+
+    # 2. Check the generic rule and High Entropy
+    for match, line_number in zip(generic_matches, _line_numbers(line_starts_array, generic_matches)):
+        if line_number in high_lines:
+            continue
+
+        line_start = line_starts[line_number - 1]
+        line = _line_text(content, line_starts, line_number)
+        start, end = match.start() - line_start, match.end() - line_start
+        has_keywords = keyword_lines.get(line_number)
+        if has_keywords is None:
+            has_keywords = keyword_lines[line_number] = _keywords_are_present(line)
+
+        confidence = _RULES_META[_GENERIC_RULE_ID]["confidence"]
+        if has_keywords:
+            confidence = "medium"
+
+        findings.append(
+            Finding(
+                file_path=file_path,
+                line=line_number,
+                snippet=_create_snippet_with_redaction(line, start, end),
+                rule_id="regex",
+                confidence=confidence,
+            )
+        )
+
+        matched_string = match.group(0)
+
+        if _has_high_entropy(matched_string):
+            confidence = "medium" if has_keywords else "low"
+
+            entropy_findings.append(
+                Finding(
+                    file_path=file_path,
+                    line=line_number,
+                    snippet=_create_snippet_with_redaction(line, start, end),
+                    rule_id="entropy",
+                    confidence=confidence,
                 )
-        
-        # 2. Check High Entropy
-        generic_rule = REGEX_RULES["GENERIC_HIGH_ENTROPY_STRING"]
-        for match in generic_rule["pattern"].finditer(line):
-            matched_string = match.group(0)
-            entropy = _calculate_shannon_entropy(matched_string)
-
-            if entropy > ENTROPY_THRESHOLD:
-                confidence = "medium" if _keywords_are_present(line) else "low"
-                
-                if not any(f.line == line_number and f.confidence == "high" for f in findings):
-                    findings.append(
-                        Finding(
-                            file_path=file_path,
-                            line=line_number,
-                            snippet=_create_snippet_with_redaction(line, match.start(), match.end()),
-                            rule_id="entropy",
-                            confidence=confidence,
-                        )
-                    )
+            )
 
+    findings.extend(entropy_findings)
     return _deduplicate_findings(findings)
 
 
 # --- Helper Functions ---
 
+def _prefilter(content: str) -> Set[int]:
+    """Returns which of the `re` passes can possibly match in `content`."""
+    if _PREFILTER_DB is None:
+        return {_HS_SPECIFIC_ID, _HS_GENERIC_ID}
+
+    hits: Set[int] = set()
+    _PREFILTER_DB.scan(content.encode("utf-8", "surrogatepass"), match_event_handler=_record_hit, context=hits)
+    return hits
+
+def _record_hit(rule_id: int, start: int, end: int, flags: int, hits: Set[int]) -> None:
+    hits.add(rule_id)
+
+def _line_numbers(line_starts: np.ndarray, matches: List[re.Match]) -> List[int]:
+    """Maps every match to its 1-based line number in one vectorised search."""
+    starts = np.fromiter((match.start() for match in matches), dtype=np.int64, count=len(matches))
+    return np.searchsorted(line_starts, starts, side="right").tolist()
+
+def _line_text(content: str, line_starts: List[int], line_number: int) -> str:
+    """Slices a single line out of `content`, without its line break."""
+    line = content[line_starts[line_number - 1]:line_starts[line_number]]
+    return line.rstrip(_LINE_BREAK_CHARS)
+
 def _keywords_are_present(line: str) -> bool:
-    line_lower = line.lower()
-    for keyword in config.KEYWORD_PATTERNS:
-        if keyword in line_lower:
-            return True
-    return False
+    return _KEYWORD_RE.search(line.lower()) is not None
 
 def _mask(s: str) -> str:
     """Masks the middle of a string, showing first/last 4 chars."""
@@ -153,31 +290,73 @@ def _create_snippet_with_redaction(line: str, start: int, end: int) -> str:
 def _deduplicate_findings(findings: List[Finding]) -> List[Finding]:
     """
     Removes duplicate findings from a list, keeping the highest confidence one.
+    On a tie, the later finding wins.
     """
-    unique_findings: Dict[str, Finding] = {}
-    
-    findings.sort(key=lambda f: 1 if f.confidence == "low" else (2 if f.confidence == "medium" else 3))
+    unique_findings: Dict[Tuple[str, int], Finding] = {}
 
     for finding in findings:
-        key = f"{finding.file_path}:{finding.line}"
-        unique_findings[key] = finding
-        
+        key = (finding.file_path, finding.line)
+        existing = unique_findings.get(key)
+        if existing is None or _CONFIDENCE_RANK[finding.confidence] >= _CONFIDENCE_RANK[existing.confidence]:
+            unique_findings[key] = finding
+
     return list(unique_findings.values())
 
 
+def _enough_diversity(text: str) -> bool:
+    """Cheap pre-filter: could this string's entropy exceed the threshold?"""
+    return len(set(text)) >= _MIN_UNIQUE_CHARS
+
+
+def _has_high_entropy(run: str) -> bool:
+    """
+    Checks each _ENTROPY_WINDOW-sized window of a run against the threshold.
+    A trailing window shorter than a generic candidate (32 chars) is skipped.
+    """
+    for start in range(0, len(run), _ENTROPY_WINDOW):
+        window = run[start:start + _ENTROPY_WINDOW]
+        if len(window) < 32:
+            break
+        if _enough_diversity(window) and _calculate_shannon_entropy(window) > ENTROPY_THRESHOLD:
+            return True
+    return False
+
+
 def _calculate_shannon_entropy(text: str) -> float:
     """
     Calculates the Shannon entropy of a given string.
+    Candidates are ASCII (see the generic pattern), so each char is one byte.
     """
-    if not text:
-        return 0
-    
-    entropy = 0
-    length = len(text)
-    counts = Counter(text)
-    
-    for count in counts.values():
-        probability = count / length
-        entropy -= probability * math.log2(probability)
-        
-    return entropy
\ No newline at end of file
+    # Shorter than any generic candidate; skip the array allocation.
+    if len(text) < 32:
+        return 0.0
+
+    data = np.frombuffer(text.encode(), dtype=np.uint8)
+    if _entropy_u8 is not None:
+        return _entropy_u8(data)
+
+    counts = np.bincount(data, minlength=256)
+    probabilities = counts[counts > 0] / len(text)
+    return float(-(probabilities * np.log2(probabilities)).sum())
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _entropy_u8(data):
+        """Single-pass entropy over a uint8 buffer, without temporaries."""
+        counts = np.zeros(256, np.int64)
+        for byte in data:
+            counts[byte] += 1
+
+        inv_length = 1.0 / data.size
+        entropy = 0.0
+        for count in counts:
+            if count:
+                probability = count * inv_length
+                entropy -= probability * math.log2(probability)
+        return entropy
+
+    # Compile (or load from cache) at import, not on the first scan.
+    _entropy_u8(np.frombuffer(b"warm-up", dtype=np.uint8))
+else:
+    _entropy_u8 = None
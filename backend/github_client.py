@@ -1,10 +1,10 @@
 import httpx
 import asyncio
 import time
-import base64
+import codecs
 import logging
 import binascii
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Optional, Tuple
 
 from .models import RateInfo, GitHubFile
 from . import config
@@ -22,9 +22,38 @@ class RateLimitExceededError(GitHubAPIError):
     """Raised when we hit a rate limit that we can't recover from (403)."""
     pass
 
+class GraphQLRateLimitError(GitHubAPIError):
+    """
+    Raised when the separate GraphQL quota is exhausted. Not a
+    RateLimitExceededError: the REST quota can still finish the scan.
+    """
+    pass
+
 # Setup logger
 logger = logging.getLogger(__name__)
 
+# Base64 chars decoded up front to sniff out binary blobs (~384 bytes)
+BINARY_SNIFF_B64_CHARS = 512
+
+
+def _looks_binary(b64_head: str) -> bool:
+    """
+    Decodes only the head of a base64 payload and checks it for NUL bytes
+    or invalid UTF-8, so binary blobs can be dropped before a full decode.
+    """
+    head = "".join(b64_head.split())
+    head = head[:len(head) - len(head) % 4]  # Whole base64 quanta only
+    sample = binascii.a2b_base64(head)
+
+    if b"\x00" in sample:
+        return True
+    try:
+        # Not final: the sample may stop in the middle of a multi-byte char
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return True
+    return False
+
 
 class GitHubClient:
     """
@@ -44,6 +73,7 @@ class GitHubClient:
         }
         if token:
             headers["Authorization"] = f"Bearer {token}"
+        self._authenticated = bool(token)
         # Use a more specific timeout
         self._client = httpx.AsyncClient(
             headers=headers, 
@@ -64,7 +94,12 @@ class GitHubClient:
         """Public property to get the current rate limit info."""
         return self._rate_info
 
-    async def _make_request(self, method: str, url: str) -> httpx.Response:
+    @property
+    def is_authenticated(self) -> bool:
+        """Whether a token was given. GitHub's GraphQL API requires one."""
+        return self._authenticated
+
+    async def _make_request(self, method: str, url: str, json: Optional[Dict[str, Any]] = None) -> httpx.Response:
         """
         A private, rate-limit-aware and resilient request helper.
         """
@@ -74,7 +109,7 @@ class GitHubClient:
         backoff = 0.5
         for attempt in range(4):
             try:
-                response = await self._client.request(method, full_url)
+                response = await self._client.request(method, full_url, json=json)
             except httpx.RequestError as e:
                 if attempt == 3:
                     logger.error(f"HTTPX request error (final): {e}")
@@ -84,16 +119,22 @@ class GitHubClient:
                 await asyncio.sleep(backoff)
                 continue
 
+            response_rate: Optional[RateInfo] = None
             if "X-RateLimit-Remaining" in response.headers and "X-RateLimit-Reset" in response.headers:
                 try:
-                    self._rate_info = RateInfo(
+                    response_rate = RateInfo(
                         remaining=int(response.headers["X-RateLimit-Remaining"]),
                         reset_at=int(response.headers["X-RateLimit-Reset"]),
                     )
-                    logger.info(f"Rate limit updated: {self._rate_info.remaining} remaining, resets at {self._rate_info.reset_at}")
                 except ValueError:
                     pass 
 
+            # GraphQL draws on its own quota (resource "graphql"); only the
+            # REST "core" quota is tracked and reported back to the user.
+            if response_rate is not None and response.headers.get("X-RateLimit-Resource", "core") == "core":
+                self._rate_info = response_rate
+                logger.info(f"Rate limit updated: {self._rate_info.remaining} remaining, resets at {self._rate_info.reset_at}")
+
             if response.status_code in (403, 429):
                 retry_after_str = response.headers.get("Retry-After")
                 if retry_after_str:
@@ -105,7 +146,11 @@ class GitHubClient:
                     except ValueError:
                         pass
                 
-                if self._rate_info.remaining == 0:
+                # Check the quota this request drew on, not always "core"
+                rate = response_rate if response_rate is not None else self._rate_info
+                if rate.remaining == 0:
+                    if response.headers.get("X-RateLimit-Resource") == "graphql":
+                        raise GraphQLRateLimitError("GitHub GraphQL API rate limit exceeded.")
                     raise RateLimitExceededError("GitHub API rate limit exceeded.")
                 
                 if attempt < 3:
@@ -135,10 +180,19 @@ class GitHubClient:
         raise GitHubAPIError("Max retries exceeded for request.")
 
 
-    async def get_repo_tree(self, owner: str, repo: str) -> List[GitHubFile]:
+    async def get_repo_tree(
+        self,
+        owner: str,
+        repo: str,
+        file_filter: Optional[Callable[[str, Optional[int]], bool]] = None,
+    ) -> Tuple[List[GitHubFile], int]:
         """
         Fetches the complete recursive file tree for the repo's default branch.
         Uses the correct tree_sha for robustness.
+
+        If given, `file_filter(path, size)` is applied to each blob before a
+        GitHubFile is built for it. Returns the kept files and the number of
+        blobs the filter rejected.
         """
         try:
             repo_info_res = await self._make_request("GET", f"/repos/{owner}/{repo}")
@@ -168,17 +222,66 @@ class GitHubClient:
             logger.warning(f"Repo {owner}/{repo} tree is truncated. Not all files may be scanned.")
         
         files: List[GitHubFile] = []
+        filtered_out = 0
         for item in tree_data.get("tree", []):
-            if item.get("type") == "blob":
-                files.append(
-                    GitHubFile(
-                        path=item.get("path"),
-                        url=item.get("url"),
-                        sha=item.get("sha"),
-                        size=item.get("size")
-                    )
+            if item.get("type") != "blob":
+                continue
+            if file_filter is not None and not file_filter(item.get("path", ""), item.get("size")):
+                filtered_out += 1
+                continue
+            files.append(
+                GitHubFile(
+                    path=item.get("path"),
+                    url=item.get("url"),
+                    sha=item.get("sha"),
+                    size=item.get("size")
                 )
-        return files
+            )
+        return files, filtered_out
+
+    async def get_blobs(self, owner: str, repo: str, shas: List[str]) -> Dict[str, str]:
+        """
+        Fetches the text of several blobs in one GraphQL request.
+
+        Returns a map of sha -> text, with "" for binary blobs. Blobs that
+        are missing or truncated in the response are left out, so the caller
+        can fall back to `get_file_content` for them. Requires a token.
+        """
+        if not shas:
+            return {}
+
+        variables: Dict[str, Any] = {"owner": owner, "name": repo}
+        params: List[str] = []
+        fields: List[str] = []
+        for i, sha in enumerate(shas):
+            variables[f"oid{i}"] = sha
+            params.append(f"$oid{i}: GitObjectID!")
+            fields.append(f"b{i}: object(oid: $oid{i}) {{ ... on Blob {{ text isBinary isTruncated }} }}")
+
+        query = (
+            f"query($owner: String!, $name: String!, {', '.join(params)}) {{ "
+            f"repository(owner: $owner, name: $name) {{ {' '.join(fields)} }} }}"
+        )
+
+        response = await self._make_request("POST", "/graphql", json={"query": query, "variables": variables})
+        payload = response.json()
+
+        errors = payload.get("errors") or []
+        if any(error.get("type") == "RATE_LIMITED" for error in errors):
+            raise GraphQLRateLimitError("GitHub GraphQL API rate limit exceeded.")
+
+        repository = (payload.get("data") or {}).get("repository")
+        if repository is None:
+            logger.warning(f"GraphQL blob query for {owner}/{repo} returned no data: {errors[:1]}")
+            return {}
+
+        blobs: Dict[str, str] = {}
+        for i, sha in enumerate(shas):
+            blob = repository.get(f"b{i}")
+            if not blob or blob.get("isTruncated"):
+                continue
+            blobs[sha] = "" if blob.get("isBinary") else (blob.get("text") or "")
+        return blobs
 
     async def get_file_content(self, blob_url: str) -> str:
         """
@@ -197,12 +300,14 @@ class GitHubClient:
             if not content_b64 or encoding != "base64":
                 return "" 
 
-            # Use the suggested b64decode fallback order
-            try:
-                decoded_bytes = base64.b64decode(content_b64.encode('utf-8'), validate=False)
-            except binascii.Error:
-                # Fallback to plain (also validate=False, but good to have)
-                decoded_bytes = base64.b64decode(content_b64.encode('utf-8'))
+            if _looks_binary(content_b64[:BINARY_SNIFF_B64_CHARS]):
+                logger.warning(f"Binary or non-UTF content at {blob_url}, skipping.")
+                return ""
+
+            # Decode straight from the str: a2b_base64 reads ASCII str data
+            # in place and skips the newlines GitHub wraps the payload with,
+            # so no encoded or stripped copy of the blob is made first.
+            decoded_bytes = binascii.a2b_base64(content_b64)
             
             return decoded_bytes.decode("utf-8", errors="replace")
         
@@ -1,11 +1,12 @@
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Import our scanner, client, and models
 from .models import ScanRequest, ScanResponse
-from .scanner import RepoScanner
+from .scanner import RepoScanner, start_scan_pool, shutdown_scan_pool
 from .github_client import (
     GitHubClient,
     GitHubAPIError,
@@ -24,10 +25,20 @@ logger = logging.getLogger(__name__)
 logger.info("Starting Secret Hunter API...")
 
 # --- FastAPI App Initialization ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Starts the detector process pool on startup and stops it on shutdown."""
+    start_scan_pool()
+    try:
+        yield
+    finally:
+        shutdown_scan_pool()
+
 app = FastAPI(
     title="Public Repo Secret Hunter API",
     description="An API to scan public GitHub repositories for potential secrets.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS (Cross-Origin Resource Sharing)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Literal, Optional
+from typing import List, Literal, NamedTuple, Optional
 
 # --- Base Model ---
 # Defines common configuration for all Pydantic models
@@ -55,9 +55,11 @@ class ScanResponse(APIModel):
 
 # --- Internal Models ---
 
-class GitHubFile(APIModel):
+class GitHubFile(NamedTuple):
     """
-    A lightweight internal model for a file from the GitHub tree.
+    A lightweight internal record for a file from the GitHub tree.
+    A NamedTuple, not a Pydantic model: it never crosses the API boundary
+    and a scan can create thousands of them.
     """
     path: str
     url: str  # This will be the blob URL
@@ -1,9 +1,12 @@
 import asyncio
+import os
 import time
 import logging
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
 
-from .github_client import GitHubClient, GitHubAPIError
+from .github_client import GitHubClient, GitHubAPIError, GraphQLRateLimitError, RateLimitExceededError
 from .models import Finding, ScanResponse, ScanStats, GitHubFile
 from . import detectors
 from . import config
@@ -11,6 +14,41 @@ from . import config
 # Setup logger
 logger = logging.getLogger(__name__)
 
+# Worker processes for the CPU-bound detector work, so regex and entropy
+# checks don't block the event loop. Started and stopped with the app
+# (see main.py); while it isn't running, files are scanned inline.
+_SCAN_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def start_scan_pool() -> None:
+    """Starts the detector process pool, if it isn't running yet."""
+    global _SCAN_POOL
+    if _SCAN_POOL is None:
+        _SCAN_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+
+def shutdown_scan_pool() -> None:
+    """
+    Stops the detector process pool without blocking the event loop;
+    queued scans are cancelled.
+    """
+    global _SCAN_POOL
+    if _SCAN_POOL is not None:
+        _SCAN_POOL.shutdown(wait=False, cancel_futures=True)
+        _SCAN_POOL = None
+
+
+def _replace_broken_scan_pool(broken: ProcessPoolExecutor) -> None:
+    """
+    Swaps a broken pool (a worker died, e.g. killed for memory) for a new
+    one. Several scans can see the same breakage; only the first replaces it.
+    """
+    global _SCAN_POOL
+    if _SCAN_POOL is broken:
+        broken.shutdown(wait=False, cancel_futures=True)
+        _SCAN_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+
 class RepoScanner:
     """
     Orchestrates the scanning of a repository.
@@ -24,6 +62,9 @@ class RepoScanner:
         # Create a semaphore to limit concurrent requests
         # to the number specified in our config.
         self.semaphore = asyncio.Semaphore(config.MAX_CONCURRENT_REQUESTS)
+        # Cleared once the GraphQL quota runs out; the rest of the scan
+        # then fetches every file over REST.
+        self._graphql_available = True
     
     async def _fetch_and_scan_file(self, file: GitHubFile) -> List[Finding]:
         """
@@ -37,25 +78,81 @@ class RepoScanner:
                 logger.debug(f"Fetching content for: {file.path}")
                 content = await self.client.get_file_content(file.url)
                 
-                if not content:
-                    return []
-                
                 # 2. Scan content
-                findings = detectors.find_secrets(file_path=file.path, content=content)
-                
-                if findings:
-                    logger.info(f"Found {len(findings)} potential secrets in: {file.path}")
-                
-                return findings
+                return await self._scan_content(file, content)
 
             except GitHubAPIError:
-                # Re-raise API errors to be caught by asyncio.gather
+                # Re-raise API errors so the scan stops
                 raise
             except Exception as e:
                 # Log other errors but don't stop the whole scan
                 logger.error(f"Failed to scan file {file.path}: {e}")
                 return []
 
+    async def _fetch_and_scan_batch(self, owner: str, repo: str, files: List[GitHubFile]) -> List[Finding]:
+        """
+        Like `_fetch_and_scan_file`, but fetches a batch of files with a
+        single GraphQL request. Files the batch could not return in full
+        are fetched one by one instead.
+        """
+        blobs: Dict[str, str] = {}
+        async with self.semaphore:
+            try:
+                if self._graphql_available:
+                    logger.debug(f"Fetching content for a batch of {len(files)} files")
+                    blobs = await self.client.get_blobs(owner, repo, [file.sha for file in files])
+            except GraphQLRateLimitError as e:
+                # GraphQL has its own quota; REST can still finish the scan
+                logger.warning(f"{e} Fetching the remaining files over REST.")
+                self._graphql_available = False
+            except RateLimitExceededError:
+                # Re-raise so the scan stops and main.py returns 429
+                raise
+            except Exception as e:
+                # Any other failure (a 5xx, a timeout on a large batch, ...)
+                # only costs this batch its GraphQL fetch
+                logger.error(f"Failed to fetch batch of {len(files)} files, falling back to REST: {e}")
+
+        findings: List[Finding] = []
+        for file in files:
+            content = blobs.get(file.sha)
+            if content is None:
+                findings.extend(await self._fetch_and_scan_file(file))
+                continue
+            try:
+                findings.extend(await self._scan_content(file, content))
+            except Exception as e:
+                logger.error(f"Failed to scan file {file.path}: {e}")
+        return findings
+
+    async def _scan_content(self, file: GitHubFile, content: str) -> List[Finding]:
+        """
+        Runs the detectors over a file's content. Large files go to the
+        process pool; for small ones the IPC would cost more than the scan.
+        """
+        if not content:
+            return []
+
+        pool = _SCAN_POOL
+        findings: Optional[List[Finding]] = None
+        if pool is not None and len(content) >= config.SCAN_POOL_MIN_FILE_SIZE:
+            loop = asyncio.get_running_loop()
+            try:
+                findings = await loop.run_in_executor(pool, detectors.find_secrets, file.path, content)
+            except BrokenProcessPool:
+                # Never report the file as clean: replace the pool for the
+                # next files and scan this one inline
+                logger.error(f"Scan pool is broken, restarting it. Scanning {file.path} inline.")
+                _replace_broken_scan_pool(pool)
+
+        if findings is None:
+            findings = detectors.find_secrets(file_path=file.path, content=content)
+
+        if findings:
+            logger.info(f"Found {len(findings)} potential secrets in: {file.path}")
+
+        return findings
+
     async def scan(self, owner: str, repo: str) -> ScanResponse:
         """
         Performs a complete scan of the given repository.
@@ -65,27 +162,20 @@ class RepoScanner:
         
         all_findings: List[Finding] = []
         files_scanned = 0
-        files_skipped = 0
         
         try:
-            # 1. Get the full list of files from the repo
-            all_files = await self.client.get_repo_tree(owner, repo)
+            # 1. Get the scannable files from the repo. They are filtered
+            # while the tree is parsed, so skipped files are only counted.
+            scannable_files, files_skipped = await self.client.get_repo_tree(
+                owner, repo, file_filter=detectors.is_file_scannable
+            )
         except GitHubAPIError as e:
             # If we can't get the tree, we can't scan.
             # This will be caught by main.py and turned into a 4xx/5xx.
             logger.error(f"Failed to get repo tree for {owner}/{repo}: {e}")
             raise e
-
-        # 2. Filter files
-        scannable_files: List[GitHubFile] = []
-        for file in all_files:
-            # We correctly pass file.size (Optional[int])
-            if detectors.is_file_scannable(file.path, file.size):
-                scannable_files.append(file)
-            else:
-                files_skipped += 1
         
-        # 3. Apply the MAX_FILES_PER_SCAN cap
+        # 2. Apply the MAX_FILES_PER_SCAN cap
         if len(scannable_files) > config.MAX_FILES_PER_SCAN:
             logger.warning(
                 f"Repo has {len(scannable_files)} scannable files. "
@@ -115,27 +205,56 @@ class RepoScanner:
                 rate_limit=self.client.rate_info
             )
 
-        # 4. Create and run all scan tasks
-        tasks = [self._fetch_and_scan_file(file) for file in scannable_files]
+        # 3. Create and run all scan tasks.
+        # Identical blobs (same sha) under several paths, e.g. vendored
+        # copies, are fetched and scanned once; the other paths reuse
+        # the findings.
+        files_by_sha: Dict[str, List[GitHubFile]] = {}
+        for file in scannable_files:
+            files_by_sha.setdefault(file.sha, []).append(file)
+        unique_files = [files[0] for files in files_by_sha.values()]
+        if len(unique_files) < files_scanned:
+            logger.info(f"{files_scanned - len(unique_files)} files are duplicates of other blobs, reusing their results.")
 
+        # With a token, blobs are fetched in batches over GraphQL
+        # (unauthenticated GraphQL requests are rejected by GitHub).
+        if self.client.is_authenticated:
+            batch_size = config.GRAPHQL_BLOB_BATCH_SIZE
+            jobs = [
+                self._fetch_and_scan_batch(owner, repo, unique_files[i:i + batch_size])
+                for i in range(0, len(unique_files), batch_size)
+            ]
+        else:
+            jobs = [self._fetch_and_scan_file(file) for file in unique_files]
+        tasks = [asyncio.create_task(job) for job in jobs]
+
+        # 4. Aggregate results as each task finishes
         try:
-            results = await asyncio.gather(*tasks)
+            sha_by_path = {file.path: file.sha for file in unique_files}
+            for next_done in asyncio.as_completed(tasks):
+                for finding in await next_done:
+                    all_findings.append(finding)
+                    # Copy the finding to every other path with the same blob
+                    for duplicate in files_by_sha[sha_by_path[finding.file_path]][1:]:
+                        all_findings.append(finding.model_copy(update={"file_path": duplicate.path}))
         except GitHubAPIError as e:
             # If any task fails with an API error, stop the scan
             # and re-raise the error to be caught by main.py
             logger.warning(f"Scan stopped due to API error: {e}")
             raise e
-        
-        # 5. Aggregate results
-        for file_findings in results:
-            all_findings.extend(file_findings)
+        finally:
+            # Don't leave fetches running after an error (or if the scan
+            # itself was cancelled); this is a no-op once all are done.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
             
         end_time = time.monotonic()
         duration_ms = int((end_time - start_time) * 1000)
         
         logger.info(f"Scan complete for {owner}/{repo} in {duration_ms}ms. Found {len(all_findings)} total secrets.")
         
-        # 6. Assemble the final ScanResponse
+        # 5. Assemble the final ScanResponse
         scan_stats = ScanStats(
             files_scanned=files_scanned,
             files_skipped=files_skipped,
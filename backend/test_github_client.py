@@ -0,0 +1,160 @@
+import base64
+import json
+
+import pytest
+import pytest_asyncio
+import respx
+
+from . import github_client
+from .models import GitHubFile
+
+API = github_client.GitHubClient.BASE_URL
+
+
+def _rate_headers(remaining: int, resource: str) -> dict:
+    return {
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": "1700000000",
+        "X-RateLimit-Resource": resource,
+    }
+
+
+@pytest_asyncio.fixture
+async def gh_client():
+    """An authenticated GitHubClient, closed after the test."""
+    client = github_client.GitHubClient(token="test-token")
+    yield client
+    await client.close()
+
+
+# --- Test _looks_binary() ---
+
+def _b64(data: bytes, wrap: int = 0) -> str:
+    """Base64-encodes data, wrapped every `wrap` chars like GitHub's payloads."""
+    encoded = base64.b64encode(data).decode()
+    if not wrap:
+        return encoded
+    return "\n".join(encoded[i:i + wrap] for i in range(0, len(encoded), wrap)) + "\n"
+
+
+# (raw blob bytes, wrap width, expected)
+BINARY_SNIFF_CASES = [
+    pytest.param(b"print('hello')\n", 0, False, id="ascii_text"),
+    pytest.param("café ünicøde ✓\n".encode(), 0, False, id="utf8_text"),
+    pytest.param(b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR", 0, True, id="nul_byte"),
+    pytest.param(b"\xff\xfe\xfd\xfc text", 0, True, id="invalid_utf8"),
+    # Decoded with replacement chars before the sniff; now skipped as binary
+    pytest.param("café = 'crème'\n".encode("latin-1"), 0, True, id="latin1_text"),
+    # The sniffed head ends in the middle of the 2-byte "é"
+    pytest.param(b"a" * 383 + "é".encode() + b"tail", 0, False, id="multibyte_cut_at_head_end"),
+    pytest.param(b"key = 'value'\n" * 40, 60, False, id="newline_wrapped_text"),
+    pytest.param(b"key = 'value'\n" * 10 + b"\x00" + b"more\n" * 40, 60, True, id="newline_wrapped_nul"),
+    pytest.param(b"a" * 1000 + b"\x00", 0, False, id="nul_past_head"),
+]
+
+@pytest.mark.parametrize("data,wrap,expected", BINARY_SNIFF_CASES)
+def test_looks_binary(data, wrap, expected):
+    # Sniffed like get_file_content does: only the head of the payload
+    head = _b64(data, wrap)[:github_client.BINARY_SNIFF_B64_CHARS]
+    assert github_client._looks_binary(head) is expected
+
+
+# --- Test rate limit tracking ---
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_graphql_rate_headers_do_not_replace_core_rate_info(gh_client):
+    respx.get(f"{API}/repos/o/r").respond(200, json={}, headers=_rate_headers(4990, "core"))
+    respx.post(f"{API}/graphql").respond(
+        200, json={"data": {"repository": {}}}, headers=_rate_headers(4999, "graphql")
+    )
+
+    await gh_client._make_request("GET", "/repos/o/r")
+    await gh_client.get_blobs("o", "r", ["abc"])
+
+    assert gh_client.rate_info.remaining == 4990
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_exhausted_graphql_quota_raises_graphql_rate_limit_error(gh_client):
+    respx.get(f"{API}/repos/o/r").respond(200, json={}, headers=_rate_headers(4990, "core"))
+    respx.post(f"{API}/graphql").respond(403, headers=_rate_headers(0, "graphql"))
+
+    await gh_client._make_request("GET", "/repos/o/r")
+    with pytest.raises(github_client.GraphQLRateLimitError) as excinfo:
+        await gh_client.get_blobs("o", "r", ["abc"])
+    # Not the REST quota: must not turn into a 429 for the whole scan
+    assert not isinstance(excinfo.value, github_client.RateLimitExceededError)
+    assert gh_client.rate_info.remaining == 4990
+
+
+# --- Test get_repo_tree() ---
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_get_repo_tree_filters_blobs_and_counts_skips(gh_client):
+    respx.get(f"{API}/repos/o/r").respond(200, json={"default_branch": "main"})
+    respx.get(f"{API}/repos/o/r/branches/main").respond(
+        200, json={"commit": {"commit": {"tree": {"sha": "tree-sha"}}}}
+    )
+    respx.get(f"{API}/repos/o/r/git/trees/tree-sha", params={"recursive": "1"}).respond(200, json={"tree": [
+        {"path": "src", "type": "tree", "sha": "sha-dir", "url": f"{API}/trees/sha-dir"},
+        {"path": "src/main.py", "type": "blob", "sha": "sha-py", "size": 120, "url": f"{API}/blobs/sha-py"},
+        {"path": "logo.png", "type": "blob", "sha": "sha-png", "size": 4096, "url": f"{API}/blobs/sha-png"},
+    ]})
+    seen = []
+
+    def file_filter(path, size):
+        seen.append((path, size))
+        return not path.endswith(".png")
+
+    files, skipped = await gh_client.get_repo_tree("o", "r", file_filter=file_filter)
+
+    assert files == [GitHubFile(path="src/main.py", url=f"{API}/blobs/sha-py", sha="sha-py", size=120)]
+    # Only rejected blobs count as skipped; the directory never reaches the filter
+    assert skipped == 1
+    assert seen == [("src/main.py", 120), ("logo.png", 4096)]
+
+
+# --- Test get_blobs() ---
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_get_blobs_passes_shas_as_variables(gh_client):
+    route = respx.post(f"{API}/graphql").respond(200, json={"data": {"repository": {}}})
+
+    await gh_client.get_blobs("o", "r", ["sha-a", "sha-b"])
+
+    body = json.loads(route.calls.last.request.content)
+    assert body["variables"] == {"owner": "o", "name": "r", "oid0": "sha-a", "oid1": "sha-b"}
+    assert "$oid0: GitObjectID!, $oid1: GitObjectID!" in body["query"]
+    assert "b0: object(oid: $oid0)" in body["query"]
+    assert "b1: object(oid: $oid1)" in body["query"]
+    # The shas only travel as variables, never spliced into the query
+    assert "sha-a" not in body["query"]
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_get_blobs_maps_blobs_to_shas(gh_client):
+    respx.post(f"{API}/graphql").respond(200, json={"data": {"repository": {
+        "b0": {"text": "print('hi')", "isBinary": False, "isTruncated": False},
+        "b1": {"text": None, "isBinary": True, "isTruncated": False},
+        "b2": {"text": "partial", "isBinary": False, "isTruncated": True},
+        "b3": None,
+    }}})
+
+    blobs = await gh_client.get_blobs("o", "r", ["text", "binary", "truncated", "missing"])
+
+    # Truncated and missing blobs are left out, for the REST fallback
+    assert blobs == {"text": "print('hi')", "binary": ""}
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_get_blobs_raises_on_graphql_rate_limit(gh_client):
+    respx.post(f"{API}/graphql").respond(200, json={
+        "data": None,
+        "errors": [{"type": "RATE_LIMITED", "message": "API rate limit exceeded"}],
+    })
+
+    with pytest.raises(github_client.GraphQLRateLimitError):
+        await gh_client.get_blobs("o", "r", ["sha-a"])
@@ -1,16 +1,11 @@
+import json
 import pytest
-import pytest_asyncio
-from fastapi.testclient import TestClient
-from unittest.mock import patch, AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
-# Import our app and the exceptions it needs to handle
-from .main import app
+# Import the models and the exceptions the app needs to handle
 from .models import ScanResponse, ScanStats, Finding, RateInfo
 from .github_client import RepositoryNotFoundError, RateLimitExceededError, GitHubAPIError
 
-# Create a TestClient instance
-client = TestClient(app)
-
 # --- Test Data ---
 # A mock scan response that our patched scanner will return
 MOCK_FINDING = Finding(
@@ -29,88 +24,65 @@ MOCK_SCAN_RESPONSE = ScanResponse(
 )
 MOCK_REPO_PAYLOAD = {"owner": "test-owner", "repo": "test-repo"}
 
+# Serialized once here rather than on every request / assertion
+PAYLOAD_BYTES = json.dumps(MOCK_REPO_PAYLOAD).encode()
+JSON_HEADERS = {"content-type": "application/json"}
+MOCK_RESPONSE_JSON = MOCK_SCAN_RESPONSE.model_dump(mode="json", by_alias=True)
+
+# --- Fixtures ---
+
+@pytest.fixture
+def mock_scanner(monkeypatch):
+    """Replaces RepoScanner in main.py with a mock; returns the instance."""
+    scanner_instance = MagicMock()
+    scanner_instance.scan = AsyncMock()
+    monkeypatch.setattr("backend.main.RepoScanner", lambda *args, **kwargs: scanner_instance)
+    return scanner_instance
+
 # --- Tests ---
 
-def test_root_endpoint():
+def test_root_endpoint(client):
     """Test the root /api endpoint."""
     response = client.get("/api")
     assert response.status_code == 200
     assert response.json() == {"message": "Hello from the Secret Hunter API!"}
 
-@patch("backend.main.RepoScanner", autospec=True)
-def test_scan_repository_success(MockRepoScanner):
+def test_scan_repository_success(mock_scanner, client):
     """Test the /api/scan endpoint on a successful scan."""
     # Configure the mock scanner to return our mock response
-    mock_scanner_instance = MockRepoScanner.return_value
-    mock_scanner_instance.scan = AsyncMock(return_value=MOCK_SCAN_RESPONSE)
+    mock_scanner.scan.return_value = MOCK_SCAN_RESPONSE
 
     # Make the API call
-    response = client.post("/api/scan", json=MOCK_REPO_PAYLOAD)
+    response = client.post("/api/scan", content=PAYLOAD_BYTES, headers=JSON_HEADERS)
 
     # Assert the response is correct
     assert response.status_code == 200
+    body = response.json()
+    assert body == MOCK_RESPONSE_JSON
     # Check that the JSON response uses the camelCase aliases
-    assert response.json()["stats"]["filesScanned"] == 1
-    assert response.json()["findings"][0]["filePath"] == "keys.js"
-    assert response.json()["rateLimit"]["resetAt"] == 1234567890
+    assert body["stats"]["filesScanned"] == 1
+    assert body["findings"][0]["filePath"] == "keys.js"
+    assert body["rateLimit"]["resetAt"] == 1234567890
     
     # Assert our scanner was called correctly
-    mock_scanner_instance.scan.assert_called_once_with(
+    mock_scanner.scan.assert_called_once_with(
         owner="test-owner", repo="test-repo"
     )
 
-@patch("backend.main.RepoScanner", autospec=True)
-def test_scan_repository_not_found(MockRepoScanner):
-    """Test the /api/scan endpoint when the repo is not found (404)."""
-    # Configure the mock scanner to raise a 404 error
-    mock_scanner_instance = MockRepoScanner.return_value
-    mock_scanner_instance.scan = AsyncMock(side_effect=RepositoryNotFoundError("Repo not found"))
-
-    # Make the API call
-    response = client.post("/api/scan", json=MOCK_REPO_PAYLOAD)
-
-    # Assert we get a 404
-    assert response.status_code == 404
-    assert "Repository not found" in response.json()["detail"]
-
-@patch("backend.main.RepoScanner", autospec=True)
-def test_scan_repository_rate_limited(MockRepoScanner):
-    """Test the /api/scan endpoint when the rate limit is exceeded (429)."""
-    # Configure the mock scanner to raise a 429 error
-    mock_scanner_instance = MockRepoScanner.return_value
-    mock_scanner_instance.scan = AsyncMock(side_effect=RateLimitExceededError("Rate limit hit"))
+# (exception raised by the scanner, expected status, expected detail substring)
+SCAN_ERROR_CASES = [
+    pytest.param(RepositoryNotFoundError("Repo not found"), 404, "Repository not found", id="not_found"),
+    pytest.param(RateLimitExceededError("Rate limit hit"), 429, "rate limit exceeded", id="rate_limited"),
+    pytest.param(GitHubAPIError("GitHub is down"), 502, "contacting GitHub", id="github_api_error"),
+    pytest.param(Exception("Something broke"), 500, "internal server error", id="internal_error"),
+]
 
-    # Make the API call
-    response = client.post("/api/scan", json=MOCK_REPO_PAYLOAD)
-
-    # Assert we get a 429
-    assert response.status_code == 429
-    assert "rate limit exceeded" in response.json()["detail"]
-
-@patch("backend.main.RepoScanner", autospec=True)
-def test_scan_repository_github_api_error(MockRepoScanner):
-    """Test the /api/scan endpoint when GitHub returns a generic error (502)."""
-    # Configure the mock scanner to raise a generic API error
-    mock_scanner_instance = MockRepoScanner.return_value
-    mock_scanner_instance.scan = AsyncMock(side_effect=GitHubAPIError("GitHub is down"))
-
-    # Make the API call
-    response = client.post("/api/scan", json=MOCK_REPO_PAYLOAD)
-
-    # Assert we get a 502 (Bad Gateway)
-    assert response.status_code == 502
-    assert "contacting GitHub" in response.json()["detail"]
+@pytest.mark.parametrize("exc,status,detail", SCAN_ERROR_CASES)
+def test_scan_repository_errors(mock_scanner, client, exc, status, detail):
+    """Test that each scanner error maps to the right status code and detail."""
+    mock_scanner.scan.side_effect = exc
 
-@patch("backend.main.RepoScanner", autospec=True)
-def test_scan_repository_internal_error(MockRepoScanner):
-    """Test the /api/scan endpoint for an unexpected server error (500)."""
-    # Configure the mock scanner to raise a generic Python exception
-    mock_scanner_instance = MockRepoScanner.return_value
-    mock_scanner_instance.scan = AsyncMock(side_effect=Exception("Something broke"))
-
-    # Make the API call
-    response = client.post("/api/scan", json=MOCK_REPO_PAYLOAD)
+    response = client.post("/api/scan", content=PAYLOAD_BYTES, headers=JSON_HEADERS)
 
-    # Assert we get a 500
-    assert response.status_code == 500
-    assert "internal server error" in response.json()["detail"]
\ No newline at end of file
+    assert response.status_code == status
+    assert detail in response.json()["detail"]